@@ -1,11 +1,10 @@
-import subprocess
+import asyncio
 import time
 import csv
-import os
-from threading import Thread
 from datetime import datetime
 
 RESULT_CSV = "task_monitor_results.csv"
+CSV_FIELDS = ["Scheduler", "Task_ID", "PID", "Start_Time", "End_Time", "Wall_Clock", "Task_Output_Time", "Monitor"]
 TASK_BINARY = "./task"
 NUM_TASKS = 4
 DURATION = 10  # Maximum expected task duration (for pidstat)
@@ -17,79 +16,77 @@ SCHEDULERS = {
     "FIFO": lambda: ["sudo", "chrt", "-f", "10", TASK_BINARY],
 }
 
-def monitor_pid(pid, interval=1):
+async def monitor_pid(pid, interval=1):
     """Monitor CPU usage of a PID using pidstat"""
     try:
-        cmd = f"pidstat -h -u -r -p {pid} {interval} {DURATION}"
-        out = subprocess.check_output(cmd, shell=True, text=True)
-        return out
+        proc = await asyncio.create_subprocess_exec(
+            "pidstat", "-h", "-u", "-r", "-p", str(pid), str(interval), str(DURATION),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        out, _ = await proc.communicate()
+        return out.decode()
     except Exception as e:
         return f"Monitoring failed: {e}"
 
-def run_task_and_monitor(cmd, label, task_id, output_list):
+async def run_task_and_monitor(cmd, label, task_id, results, writer):
     start = time.time()
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
     pid = proc.pid
 
-    # Start monitor in parallel
-    monitor_thread = Thread(target=lambda: output_list.append({
+    # One entry per task, registered up front and mutated in place; no
+    # re-scan of the shared results container on completion.
+    entry = results[(label, task_id)] = {
         "Scheduler": label,
         "Task_ID": task_id,
         "Start_Time": datetime.now().isoformat(),
         "PID": pid,
-        "Monitor": monitor_pid(pid)
-    }))
-    monitor_thread.start()
+    }
 
-    stdout, stderr = proc.communicate()
+    # Monitor runs concurrently as a task on the same loop; no thread per PID
+    async def monitor():
+        entry["Monitor"] = await monitor_pid(pid)
+    monitor_task = asyncio.ensure_future(monitor())
+
+    stdout, stderr = await proc.communicate()
     end = time.time()
 
     task_time = None
     try:
-        task_time = float(stdout.strip().split()[-1])
-    except:
+        task_time = float(stdout.decode().strip().split()[-1])
+    except Exception:
         task_time = end - start
 
-    for entry in output_list:
-        if entry["Task_ID"] == task_id and entry["Scheduler"] == label:
-            entry["End_Time"] = datetime.now().isoformat()
-            entry["Wall_Clock"] = end - start
-            entry["Task_Output_Time"] = task_time
-            break
+    # Wait for the monitor output before writing the finished row
+    await monitor_task
 
-    monitor_thread.join()
+    entry["End_Time"] = datetime.now().isoformat()
+    entry["Wall_Clock"] = end - start
+    entry["Task_Output_Time"] = task_time
+    # Stream the finished row out immediately; single-threaded loop,
+    # so writerow calls never interleave and no lock is needed.
+    writer.writerow(entry)
 
-def run_scheduler(label):
+async def run_scheduler(label, writer):
     print(f"\n== Running {label} ==")
-    results = []
-    threads = []
-
-    for i in range(NUM_TASKS):
-        cmd = SCHEDULERS[label]()
-        t = Thread(target=run_task_and_monitor, args=(cmd, label, i+1, results))
-        threads.append(t)
-        t.start()
+    results = {}
 
-    for t in threads:
-        t.join()
-    
-    return results
+    await asyncio.gather(*(
+        run_task_and_monitor(SCHEDULERS[label](), label, i + 1, results, writer)
+        for i in range(NUM_TASKS)
+    ))
 
-def write_csv(results):
+async def main():
     with open(RESULT_CSV, "w", newline="") as f:
-        fieldnames = ["Scheduler", "Task_ID", "PID", "Start_Time", "End_Time", "Wall_Clock", "Task_Output_Time", "Monitor"]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
         writer.writeheader()
-        for row in results:
-            writer.writerow(row)
+        for scheduler in SCHEDULERS.keys():
+            await run_scheduler(scheduler, writer)
     print(f"\n✅ Results saved to {RESULT_CSV}")
 
-def main():
-    all_results = []
-    for scheduler in SCHEDULERS.keys():
-        results = run_scheduler(scheduler)
-        all_results.extend(results)
-    write_csv(all_results)
-
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
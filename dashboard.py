@@ -7,39 +7,69 @@ import time
 DB_FILE = "system_monitor.db"
 REFRESH_INTERVAL = 10  # seconds
 
-def load_data():
+def latest_timestamp():
+    """Cheap cache key: reruns only reload the frames when new data arrived."""
+    try:
+        conn = sqlite3.connect(DB_FILE)
+        try:
+            return conn.execute("SELECT MAX(timestamp) FROM system_metrics").fetchone()[0]
+        finally:
+            conn.close()
+    except Exception:
+        return None
+
+@st.cache_data(ttl=REFRESH_INTERVAL, show_spinner=False)
+def load_data(latest_ts=None):
     conn = sqlite3.connect(DB_FILE)
     try:
         system_df = pd.read_sql_query("SELECT * FROM system_metrics ORDER BY timestamp DESC LIMIT 100", conn)
-        process_df = pd.read_sql_query("SELECT * FROM process_metrics ORDER BY timestamp DESC LIMIT 500", conn)
-        core_df = pd.read_sql_query("SELECT * FROM cpu_core_stats ORDER BY timestamp DESC LIMIT 500", conn)
+        # Turnaround/efficiency are computed by SQLite for the latest snapshot
+        # only, so pandas never sees the raw 500-row history.
+        now_ts = time.time()
+        process_df = pd.read_sql_query("""
+            SELECT pid, name, user, status, cpu_time, ctx_switches, create_time,
+                   (? - create_time) AS turnaround,
+                   cpu_time * 1.0 / NULLIF(? - create_time, 0) AS efficiency
+            FROM process_metrics
+            WHERE timestamp = (SELECT MAX(timestamp) FROM process_metrics)
+            ORDER BY cpu_time DESC LIMIT 200
+        """, conn, params=(now_ts, now_ts))
+        core_df = pd.read_sql_query("""
+            SELECT core, cpu_percent FROM cpu_core_stats
+            WHERE timestamp = (SELECT MAX(timestamp) FROM cpu_core_stats)
+            ORDER BY core
+        """, conn)
         sched_df = pd.read_sql_query("SELECT * FROM scheduler_stats ORDER BY timestamp DESC LIMIT 500", conn)
     except Exception as e:
         st.error(f"Error reading DB: {e}")
         return None, None, None, None
     finally:
         conn.close()
+    # Parse and order timestamps once here, inside the cache; the fixed
+    # ISO8601 format plus cache=True skips per-row format inference on rerun.
+    system_df["timestamp"] = pd.to_datetime(system_df["timestamp"], format="ISO8601", cache=True)
+    system_df = system_df.sort_values("timestamp").reset_index(drop=True)
     return system_df, core_df, process_df, sched_df
 
 def compute_statistics(system_df, process_df, sched_df):
     stats = {}
 
-    # System-level
-    stats["Avg CPU %"] = round(system_df["cpu_percent"].mean(), 2)
-    stats["Max CPU %"] = round(system_df["cpu_percent"].max(), 2)
-    stats["Avg Mem %"] = round(system_df["memory_percent"].mean(), 2)
-    stats["Total Context Switches"] = int(system_df["context_switches"].sum())
+    # System-level: one reduction pass over all three columns
+    sys_agg = system_df[["cpu_percent", "memory_percent", "context_switches"]].agg(["mean", "max", "sum"])
+    stats["Avg CPU %"] = round(sys_agg.at["mean", "cpu_percent"], 2)
+    stats["Max CPU %"] = round(sys_agg.at["max", "cpu_percent"], 2)
+    stats["Avg Mem %"] = round(sys_agg.at["mean", "memory_percent"], 2)
+    stats["Total Context Switches"] = int(sys_agg.at["sum", "context_switches"])
 
     # Process-level
     if process_df is not None and not process_df.empty:
-        # Use create_time or fallback to zero
-        process_df["create_time"] = process_df.get("create_time", 0)
-        uptime = (time.time() - process_df["create_time"]).clip(lower=1)
-        process_df["efficiency"] = process_df["cpu_time"] / uptime
-        stats["Avg Process Efficiency"] = round(process_df["efficiency"].mean(), 3)
-        stats["Avg CPU Time (s)"] = round(process_df["cpu_time"].mean(), 2)
-        stats["Max CPU Time (s)"] = round(process_df["cpu_time"].max(), 2)
-        stats["Total Context Switches (Processes)"] = int(process_df["ctx_switches"].sum())
+        # efficiency arrives precomputed from SQL; NULLIF left NaN where
+        # turnaround was zero
+        proc_agg = process_df[["efficiency", "cpu_time", "ctx_switches"]].fillna(0).agg(["mean", "max", "sum"])
+        stats["Avg Process Efficiency"] = round(proc_agg.at["mean", "efficiency"], 3)
+        stats["Avg CPU Time (s)"] = round(proc_agg.at["mean", "cpu_time"], 2)
+        stats["Max CPU Time (s)"] = round(proc_agg.at["max", "cpu_time"], 2)
+        stats["Total Context Switches (Processes)"] = int(proc_agg.at["sum", "ctx_switches"])
     else:
         stats["Avg Process Efficiency"] = "N/A"
         stats["Avg CPU Time (s)"] = "N/A"
@@ -48,9 +78,10 @@ def compute_statistics(system_df, process_df, sched_df):
 
     # Scheduler-level
     if sched_df is not None and not sched_df.empty:
-        stats["Avg Run Queue Length"] = round(sched_df["run_queue_length"].mean(), 2)
-        stats["Max Run Queue Length"] = int(sched_df["run_queue_length"].max())
-        stats["Avg Run Time (ms)"] = round(sched_df["run_time_ns"].mean() / 1e6, 2)
+        sched_agg = sched_df[["run_queue_length", "run_time_ns"]].agg(["mean", "max"])
+        stats["Avg Run Queue Length"] = round(sched_agg.at["mean", "run_queue_length"], 2)
+        stats["Max Run Queue Length"] = int(sched_agg.at["max", "run_queue_length"])
+        stats["Avg Run Time (ms)"] = round(sched_agg.at["mean", "run_time_ns"] / 1e6, 2)
     else:
         stats["Avg Run Queue Length"] = "N/A"
         stats["Max Run Queue Length"] = "N/A"
@@ -62,7 +93,7 @@ def draw_dashboard():
     st.title("📊 Real-time System Monitoring Dashboard")
 
     try:
-        system_df, core_df, process_df, sched_df = load_data()
+        system_df, core_df, process_df, sched_df = load_data(latest_timestamp())
         if system_df is None:
             st.warning("Waiting for system metrics data...")
             return
@@ -80,21 +111,21 @@ def draw_dashboard():
 
         st.subheader("🧠 CPU Core Usage")
         if core_df is not None and not core_df.empty:
-            # Show latest per-core CPU %
-            latest_core = core_df.groupby("core").first().reset_index()
-            st.bar_chart(latest_core.set_index("core")["cpu_percent"])
+            # Query already returns one row per core for the latest timestamp
+            st.bar_chart(core_df.set_index("core")["cpu_percent"])
         else:
             st.info("No CPU core data available.")
 
         st.subheader("⚙️ Per-Process Statistics (Active)")
         if process_df is not None and not process_df.empty:
             # Filter active processes (status not zombie)
-            active_procs = process_df[process_df["status"] != "zombie"].copy()
-            st.dataframe(
-                active_procs[["pid", "name", "user", "status", "cpu_time", "ctx_switches"]]
-                .sort_values(by="cpu_time", ascending=False),
-                use_container_width=True
-            )
+            active_procs = process_df[process_df["status"] != "zombie"]
+            display = (active_procs[["pid", "name", "user", "status", "cpu_time", "ctx_switches"]]
+                       .sort_values(by="cpu_time", ascending=False))
+            # Format the float column to display strings up front; a plain
+            # DataFrame serializes far cheaper than per-cell styling.
+            display["cpu_time"] = display["cpu_time"].map("{:.2f}".format)
+            st.dataframe(display, use_container_width=True)
         else:
             st.info("No process data available.")
 
@@ -107,8 +138,8 @@ def draw_dashboard():
             st.info("No scheduler stats available.")
 
         st.subheader("📈 Historical CPU/Memory Usage")
-        system_df_sorted = system_df.sort_values("timestamp")
-        st.line_chart(system_df_sorted[["cpu_percent", "memory_percent"]].reset_index(drop=True))
+        # load_data already returns the frame sorted by parsed timestamp
+        st.line_chart(system_df[["cpu_percent", "memory_percent"]])
 
         st.subheader("📋 Detailed Metrics Summary")
         for k, v in stats.items():
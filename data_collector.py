@@ -1,5 +1,8 @@
 # data_collector.py
 
+import json
+import os
+import pwd
 import sqlite3
 import psutil
 import time
@@ -9,9 +12,60 @@ DB_FILE = "monitoring.db"
 MAX_ROWS = 500
 MAX_PROC_ROWS = 1000  # limit per-process stats rows
 
+# Single shared connection; opening/closing one per insert re-reads the schema
+# and WAL header every 10 s cycle for no benefit.
+_CONN = sqlite3.connect(DB_FILE, isolation_level=None, check_same_thread=False)
+
+# Trim statements kept as constants so SQLite's statement cache reuses the
+# compiled form across cycles. The cutoff subquery is an index-only walk over
+# the timestamp index; no row-count scan is needed (deletes nothing while the
+# table is still below the limit, since the subquery yields NULL).
+_TRIM_SYSTEM_SQL = """
+    DELETE FROM system_metrics
+    WHERE timestamp < (
+        SELECT timestamp FROM system_metrics ORDER BY timestamp DESC LIMIT 1 OFFSET ?
+    )
+"""
+
+_TRIM_PROCESS_SQL = """
+    DELETE FROM process_metrics
+    WHERE timestamp < (
+        SELECT timestamp FROM process_metrics ORDER BY timestamp DESC LIMIT 1 OFFSET ?
+    )
+"""
+
+_TRIM_CORE_SQL = """
+    DELETE FROM cpu_core_stats
+    WHERE timestamp < (
+        SELECT timestamp FROM cpu_core_stats ORDER BY timestamp DESC LIMIT 1 OFFSET ?
+    )
+"""
+
+# The whole process batch is bound as one JSON parameter and unpacked by
+# SQLite's C-side json_each, instead of binding 8 parameters per row through
+# executemany.
+_INSERT_PROCESS_SQL = """
+    INSERT INTO process_metrics
+    SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'),
+           json_extract(value, '$[2]'), json_extract(value, '$[3]'),
+           json_extract(value, '$[4]'), json_extract(value, '$[5]'),
+           json_extract(value, '$[6]'), json_extract(value, '$[7]')
+    FROM json_each(?) WHERE true
+    ON CONFLICT(timestamp, pid) DO UPDATE SET
+        name=excluded.name,
+        user=excluded.user,
+        cpu_time=excluded.cpu_time,
+        create_time=excluded.create_time,
+        ctx_switches=excluded.ctx_switches,
+        status=excluded.status
+"""
+
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+    c = _CONN.cursor()
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute("PRAGMA synchronous=NORMAL")
+    c.execute("PRAGMA temp_store=MEMORY")
+    c.execute("PRAGMA cache_size=-20000")
     # system metrics table (overall system info)
     c.execute('''
         CREATE TABLE IF NOT EXISTS system_metrics (
@@ -24,7 +78,7 @@ def init_db():
             load_avg_1 REAL,
             load_avg_5 REAL,
             load_avg_15 REAL
-        )
+        ) STRICT
     ''')
 
     # per process stats
@@ -39,7 +93,7 @@ def init_db():
             ctx_switches INTEGER,
             status TEXT,
             PRIMARY KEY(timestamp, pid)
-        )
+        ) STRICT
     ''')
 
     # per-core cpu usage
@@ -49,19 +103,33 @@ def init_db():
             core INTEGER,
             cpu_percent REAL,
             PRIMARY KEY(timestamp, core)
-        )
+        ) STRICT
     ''')
 
-    conn.commit()
-    conn.close()
+    # timestamp indexes keep the trim DELETEs and latest-snapshot queries off
+    # full table scans
+    c.execute('CREATE INDEX IF NOT EXISTS idx_system_metrics_ts ON system_metrics(timestamp DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_process_metrics_ts ON process_metrics(timestamp DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_cpu_core_stats_ts ON cpu_core_stats(timestamp DESC)')
+
+    _CONN.commit()
 
 def collect_system_metrics():
     cpu_percent = psutil.cpu_percent(interval=1)
     memory_percent = psutil.virtual_memory().percent
-    ctx_switches = sum(p.num_ctx_switches().voluntary + p.num_ctx_switches().involuntary for p in psutil.process_iter())
-    procs = [p.info for p in psutil.process_iter(['status'])]
-    running = sum(1 for p in procs if p['status'] == psutil.STATUS_RUNNING)
-    sleeping = sum(1 for p in procs if p['status'] == psutil.STATUS_SLEEPING)
+    # System-wide counter from /proc/stat: one read instead of walking every
+    # process and summing its per-pid counters.
+    ctx_switches = psutil.cpu_stats().ctx_switches
+    running = sleeping = 0
+    for pid, buf in batch_read_proc_stat(_list_pids()):
+        try:
+            state = buf[buf.rindex(b")") + 2:][:1]
+        except ValueError:
+            continue
+        if state == b"R":
+            running += 1
+        elif state == b"S":
+            sleeping += 1
     load1, load5, load15 = psutil.getloadavg()
 
     return {
@@ -76,25 +144,132 @@ def collect_system_metrics():
         'load_avg_15': load15,
     }
 
+# --- direct /proc readers (no per-process psutil objects) ---
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+def _read_boot_time():
+    with open("/proc/stat", "rb") as f:
+        for line in f:
+            if line.startswith(b"btime"):
+                return float(line.split()[1])
+    return 0.0
+
+_BOOT_TIME = _read_boot_time()
+_UID_NAMES = {}  # uid -> username cache
+
+# /proc/<pid>/stat state letter -> psutil-style status string
+_PROC_STATUS = {
+    b"R": "running",
+    b"S": "sleeping",
+    b"D": "disk-sleep",
+    b"Z": "zombie",
+    b"T": "stopped",
+    b"t": "tracing-stop",
+    b"X": "dead",
+    b"x": "dead",
+    b"W": "waking",
+    b"P": "parked",
+    b"I": "idle",
+}
+
+def _list_pids():
+    # scandir goes through getdents64 in batches and skips the stat() call
+    # that os.listdir-style filtering would add
+    return [int(e.name) for e in os.scandir("/proc") if e.name.isdigit()]
+
+def _read_file(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, 65536)
+    finally:
+        os.close(fd)
+
+def batch_read_proc_stat(pids):
+    """Read /proc/<pid>/stat for every pid in one tight loop.
+
+    Poor man's io_uring batch: one open/read/close per pid with no psutil
+    Process construction in between; pids that exit mid-scan are skipped.
+    """
+    bufs = []
+    append = bufs.append
+    for pid in pids:
+        try:
+            append((pid, _read_file("/proc/%d/stat" % pid)))
+        except OSError:
+            continue
+    return bufs
+
+def _parse_stat_py(buf):
+    """Tokenize a /proc/<pid>/stat buffer -> (name, state, cpu_time, create_time)."""
+    # comm is parenthesized and may contain spaces; split around it.
+    lpar = buf.index(b"(")
+    rpar = buf.rindex(b")")
+    name = buf[lpar + 1:rpar].decode("utf-8", "replace")
+    fields = buf[rpar + 2:].split()
+    cpu_time = (int(fields[11]) + int(fields[12])) / _CLK_TCK     # utime + stime
+    create_time = _BOOT_TIME + int(fields[19]) / _CLK_TCK         # starttime
+    return name, fields[0], cpu_time, create_time
+
+# Prefer the Cython tokenizer (see parse_stat.pyx / setup.py) when it has been
+# built; the pure-Python fallback parses the same fields.
+try:
+    from parse_stat import parse_stat as _parse_stat_c
+except ImportError:
+    _parse_stat_c = None
+
+def _parse_stat(buf):
+    if _parse_stat_c is not None:
+        name, state, cpu_time, create_time = _parse_stat_c(buf, _CLK_TCK, _BOOT_TIME)
+    else:
+        name, state, cpu_time, create_time = _parse_stat_py(buf)
+    return name, _PROC_STATUS.get(state, "unknown"), cpu_time, create_time
+
+def _username(pid):
+    try:
+        uid = os.stat("/proc/%d" % pid).st_uid
+    except OSError:
+        return ""
+    name = _UID_NAMES.get(uid)
+    if name is None:
+        try:
+            name = pwd.getpwuid(uid).pw_name
+        except KeyError:
+            name = str(uid)
+        _UID_NAMES[uid] = name
+    return name
+
+def _ctx_switches(pid):
+    try:
+        buf = _read_file("/proc/%d/status" % pid)
+    except OSError:
+        return 0
+    total = 0
+    for line in buf.splitlines():
+        if line.startswith(b"voluntary_ctxt_switches") or \
+           line.startswith(b"nonvoluntary_ctxt_switches"):
+            total += int(line.split()[1])
+    return total
+
 def collect_process_metrics():
     procs = []
     now_ts = datetime.now().isoformat()
-    for p in psutil.process_iter(['pid', 'name', 'username', 'cpu_times', 'create_time', 'num_ctx_switches', 'status']):
+    append = procs.append
+    for pid, buf in batch_read_proc_stat(_list_pids()):
         try:
-            cpu_time = sum(p.info['cpu_times'][:2])  # user + system time
-            ctx_switches = p.info['num_ctx_switches'].voluntary + p.info['num_ctx_switches'].involuntary
-            procs.append((
-                now_ts,
-                p.info['pid'],
-                p.info['name'],
-                p.info['username'],
-                cpu_time,
-                p.info['create_time'],
-                ctx_switches,
-                p.info['status']
-            ))
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            name, status, cpu_time, create_time = _parse_stat(buf)
+        except (ValueError, IndexError):
             continue
+        append((
+            now_ts,
+            pid,
+            name,
+            _username(pid),
+            cpu_time,
+            create_time,
+            _ctx_switches(pid),
+            status
+        ))
     return procs
 
 def collect_cpu_core_stats():
@@ -103,55 +278,43 @@ def collect_cpu_core_stats():
     return [(now_ts, idx, val) for idx, val in enumerate(per_core)]
 
 def insert_system_metrics(metrics):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+    c = _CONN.cursor()
     c.execute('''
-        INSERT OR REPLACE INTO system_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO system_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(timestamp) DO UPDATE SET
+            cpu_percent=excluded.cpu_percent,
+            memory_percent=excluded.memory_percent,
+            context_switches=excluded.context_switches,
+            processes_running=excluded.processes_running,
+            processes_sleeping=excluded.processes_sleeping,
+            load_avg_1=excluded.load_avg_1,
+            load_avg_5=excluded.load_avg_5,
+            load_avg_15=excluded.load_avg_15
     ''', tuple(metrics.values()))
 
     # Keep last MAX_ROWS entries
-    c.execute(f'''
-        DELETE FROM system_metrics
-        WHERE timestamp NOT IN (
-            SELECT timestamp FROM system_metrics ORDER BY timestamp DESC LIMIT {MAX_ROWS}
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    c.execute(_TRIM_SYSTEM_SQL, (MAX_ROWS - 1,))
+    _CONN.commit()
 
 def insert_process_metrics(procs):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.executemany('''
-        INSERT OR REPLACE INTO process_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', procs)
+    c = _CONN.cursor()
+    c.execute(_INSERT_PROCESS_SQL, (json.dumps(procs),))
 
     # Keep last MAX_PROC_ROWS timestamps * pids approximately (may not be perfect)
-    c.execute(f'''
-        DELETE FROM process_metrics
-        WHERE timestamp NOT IN (
-            SELECT timestamp FROM process_metrics ORDER BY timestamp DESC LIMIT {MAX_ROWS}
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    c.execute(_TRIM_PROCESS_SQL, (MAX_ROWS - 1,))
+    _CONN.commit()
 
 def insert_cpu_core_stats(core_stats):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+    c = _CONN.cursor()
     c.executemany('''
-        INSERT OR REPLACE INTO cpu_core_stats VALUES (?, ?, ?)
+        INSERT INTO cpu_core_stats VALUES (?, ?, ?)
+        ON CONFLICT(timestamp, core) DO UPDATE SET
+            cpu_percent=excluded.cpu_percent
     ''', core_stats)
 
     # Keep last MAX_ROWS timestamps * cores approx
-    c.execute(f'''
-        DELETE FROM cpu_core_stats
-        WHERE timestamp NOT IN (
-            SELECT timestamp FROM cpu_core_stats ORDER BY timestamp DESC LIMIT {MAX_ROWS}
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    c.execute(_TRIM_CORE_SQL, (MAX_ROWS - 1,))
+    _CONN.commit()
 
 if __name__ == "__main__":
     init_db()
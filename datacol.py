@@ -1,6 +1,7 @@
 import sqlite3
 import time
 import psutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
 import subprocess
@@ -10,64 +11,82 @@ DB_FILE = "system_monitor.db"
 MAX_RECORDS = 500
 SLEEP_INTERVAL = 10
 
+# One persistent connection for the whole collector; WAL + relaxed sync keeps
+# the per-cycle insert burst cheap (no journal rewrite, no per-statement fsync).
+DB_CONN = sqlite3.connect(DB_FILE, isolation_level=None, check_same_thread=False)
+DB_CONN.execute("PRAGMA journal_mode=WAL")
+DB_CONN.execute("PRAGMA synchronous=NORMAL")
+DB_CONN.execute("PRAGMA temp_store=MEMORY")
+DB_CONN.execute("PRAGMA cache_size=-20000")
+
 def init_db():
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS system_metrics (
-            timestamp TEXT, cpu_percent REAL, memory_percent REAL,
-            context_switches INTEGER, processes_running INTEGER,
-            processes_sleeping INTEGER, load_avg_1 REAL,
-            load_avg_5 REAL, load_avg_15 REAL
-        )""")
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS process_metrics (
-            timestamp TEXT, pid INTEGER, name TEXT, user TEXT,
-            cpu_time REAL, create_time REAL, ctx_switches INTEGER,
-            status TEXT
-        )""")
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS cpu_core_stats (
-            timestamp TEXT, core INTEGER, cpu_percent REAL
-        )""")
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS scheduler_stats (
-            timestamp TEXT, cpu INTEGER, run_queue_length INTEGER,
-            context_switches INTEGER, run_time_ns INTEGER
-        )""")
-
-        conn.commit()
+    cursor = DB_CONN.cursor()
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS system_metrics (
+        timestamp TEXT, cpu_percent REAL, memory_percent REAL,
+        context_switches INTEGER, processes_running INTEGER,
+        processes_sleeping INTEGER, load_avg_1 REAL,
+        load_avg_5 REAL, load_avg_15 REAL
+    ) STRICT""")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS process_metrics (
+        timestamp TEXT, pid INTEGER, name TEXT, user TEXT,
+        cpu_time REAL, create_time REAL, ctx_switches INTEGER,
+        status TEXT
+    ) STRICT""")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS cpu_core_stats (
+        timestamp TEXT, core INTEGER, cpu_percent REAL
+    ) STRICT""")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS scheduler_stats (
+        timestamp TEXT, cpu INTEGER, run_queue_length INTEGER,
+        context_switches INTEGER, run_time_ns INTEGER
+    ) STRICT""")
+
+    for table in ("system_metrics", "process_metrics", "cpu_core_stats", "scheduler_stats"):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_ts ON {table}(timestamp DESC)")
+    # covering index for the dashboard's latest-per-core lookup
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cpu_core_stats_ts_core ON cpu_core_stats(timestamp, core)")
+
+    DB_CONN.commit()
 
 def limit_table_rows(conn, table_name):
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-    count = cursor.fetchone()[0]
-    if count > MAX_RECORDS:
-        to_delete = count - MAX_RECORDS
-        cursor.execute(f"""
-            DELETE FROM {table_name}
-            WHERE rowid IN (
-                SELECT rowid FROM {table_name}
-                ORDER BY timestamp ASC LIMIT ?
-            )
-        """, (to_delete,))
-        conn.commit()
+    # Runs inside the caller's transaction; the caller commits. The cutoff
+    # subquery walks the timestamp index instead of COUNT(*)-scanning the
+    # table, and yields NULL (deleting nothing) while the table is small.
+    conn.execute(f"""
+        DELETE FROM {table_name}
+        WHERE timestamp < (
+            SELECT timestamp FROM {table_name}
+            ORDER BY timestamp DESC LIMIT 1 OFFSET ?
+        )
+    """, (MAX_RECORDS - 1,))
+
+# Keep /proc/schedstat open across ticks: one lseek+read per cycle, parsed as
+# bytes, instead of reopening and decoding the file into per-line str objects.
+# Opened lazily so kernels without schedstat only fail inside the collect loop.
+_SCHEDSTAT_FD = None
 
 def collect_proc_schedstat(timestamp):
+    global _SCHEDSTAT_FD
+    if _SCHEDSTAT_FD is None:
+        _SCHEDSTAT_FD = os.open("/proc/schedstat", os.O_RDONLY)
+    os.lseek(_SCHEDSTAT_FD, 0, os.SEEK_SET)
+    buf = os.read(_SCHEDSTAT_FD, 65536)
     stats = []
-    with open("/proc/schedstat", "r") as f:
-        for idx, line in enumerate(f):
-            if line.startswith("cpu") and not line.startswith("cpu "):
-                parts = line.split()
-                cpu = idx - 1
-                run_time_ns = int(parts[1])
-                context_switches = int(parts[2])
-                run_queue_length = int(parts[3])
-                stats.append((timestamp, cpu, run_queue_length, context_switches, run_time_ns))
+    for line in buf.split(b"\n"):
+        if line.startswith(b"cpu") and line[3:4] != b" ":
+            parts = line.split()
+            cpu = int(parts[0][3:])
+            run_time_ns = int(parts[1])
+            context_switches = int(parts[2])
+            run_queue_length = int(parts[3])
+            stats.append((timestamp, cpu, run_queue_length, context_switches, run_time_ns))
     return stats
 
 def start_bpftrace_logger():
@@ -82,11 +101,15 @@ tracepoint:sched:sched_switch {
 def collect_metrics():
     init_db()
     threading.Thread(target=start_bpftrace_logger, daemon=True).start()
+    executor = ThreadPoolExecutor(max_workers=2)
 
     while True:
         timestamp = datetime.utcnow().isoformat()
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # One per-core sample over a single 1 s window; the overall
+            # percentage is derived from it rather than sampled separately.
+            # Runs in the pool while this thread walks /proc for the rest.
+            cpu_future = executor.submit(psutil.cpu_percent, 1, True)
             memory_percent = psutil.virtual_memory().percent
             ctx_switches = psutil.cpu_stats().ctx_switches
 
@@ -94,68 +117,75 @@ def collect_metrics():
             processes = list(psutil.process_iter(['pid', 'name', 'username', 'cpu_times', 'create_time', 'status', 'num_ctx_switches']))
             processes_running = sum(1 for p in processes if p.info['status'] == psutil.STATUS_RUNNING)
             processes_sleeping = sum(1 for p in processes if p.info['status'] == psutil.STATUS_SLEEPING)
+            per_core_usage = cpu_future.result()
+            cpu_percent = sum(per_core_usage) / len(per_core_usage)
 
-            with sqlite3.connect(DB_FILE) as conn:
-                cursor = conn.cursor()
-
-                cursor.execute("""
-                INSERT INTO system_metrics
-                (timestamp, cpu_percent, memory_percent, context_switches,
+            sys_rows = [(
+                timestamp, cpu_percent, memory_percent, ctx_switches,
                 processes_running, processes_sleeping,
-                load_avg_1, load_avg_5, load_avg_15)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    timestamp, cpu_percent, memory_percent, ctx_switches,
-                    processes_running, processes_sleeping,
-                    load_avg[0], load_avg[1], load_avg[2]
-                ))
-
-                for proc in processes:
-                    try:
-                        cpu_time = sum(proc.info['cpu_times']) if proc.info['cpu_times'] else 0.0
-                        cursor.execute("""
-                        INSERT INTO process_metrics
-                        (timestamp, pid, name, user, cpu_time,
-                        create_time, ctx_switches, status)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            timestamp,
-                            proc.info['pid'],
-                            proc.info['name'],
-                            proc.info['username'],
-                            cpu_time,
-                            proc.info['create_time'],
-                            proc.info['num_ctx_switches'].voluntary + proc.info['num_ctx_switches'].involuntary if proc.info['num_ctx_switches'] else 0,
-                            proc.info['status']
-                        ))
-                    except Exception:
-                        continue
-
-                per_core_usage = psutil.cpu_percent(interval=None, percpu=True)
-                for core, usage in enumerate(per_core_usage):
-                    cursor.execute("""
-                    INSERT INTO cpu_core_stats (timestamp, core, cpu_percent)
-                    VALUES (?, ?, ?)
-                    """, (timestamp, core, usage))
-
-                schedstats = collect_proc_schedstat(timestamp)
-                for row in schedstats:
-                    cursor.execute("""
-                    INSERT INTO scheduler_stats
-                    (timestamp, cpu, run_queue_length, context_switches, run_time_ns)
-                    VALUES (?, ?, ?, ?, ?)
-                    """, row)
-
-                conn.commit()
-
-                # Trim data
-                for table in ["system_metrics", "process_metrics", "cpu_core_stats", "scheduler_stats"]:
-                    limit_table_rows(conn, table)
+                load_avg[0], load_avg[1], load_avg[2]
+            )]
+
+            proc_rows = []
+            for proc in processes:
+                try:
+                    cpu_time = sum(proc.info['cpu_times']) if proc.info['cpu_times'] else 0.0
+                    proc_rows.append((
+                        timestamp,
+                        proc.info['pid'],
+                        proc.info['name'],
+                        proc.info['username'],
+                        cpu_time,
+                        proc.info['create_time'],
+                        proc.info['num_ctx_switches'].voluntary + proc.info['num_ctx_switches'].involuntary if proc.info['num_ctx_switches'] else 0,
+                        proc.info['status']
+                    ))
+                except Exception:
+                    continue
+
+            core_rows = [(timestamp, core, usage) for core, usage in enumerate(per_core_usage)]
+
+            sched_rows = collect_proc_schedstat(timestamp)
+
+            # One transaction per cycle: batched inserts plus trims, single fsync.
+            cursor = DB_CONN.cursor()
+            DB_CONN.execute("BEGIN IMMEDIATE")
+            cursor.executemany("""
+            INSERT INTO system_metrics
+            (timestamp, cpu_percent, memory_percent, context_switches,
+            processes_running, processes_sleeping,
+            load_avg_1, load_avg_5, load_avg_15)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, sys_rows)
+
+            cursor.executemany("""
+            INSERT INTO process_metrics
+            (timestamp, pid, name, user, cpu_time,
+            create_time, ctx_switches, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, proc_rows)
+
+            cursor.executemany("""
+            INSERT INTO cpu_core_stats (timestamp, core, cpu_percent)
+            VALUES (?, ?, ?)
+            """, core_rows)
+
+            cursor.executemany("""
+            INSERT INTO scheduler_stats
+            (timestamp, cpu, run_queue_length, context_switches, run_time_ns)
+            VALUES (?, ?, ?, ?, ?)
+            """, sched_rows)
+
+            for table in ["system_metrics", "process_metrics", "cpu_core_stats", "scheduler_stats"]:
+                limit_table_rows(DB_CONN, table)
+
+            DB_CONN.commit()
 
         except Exception as e:
+            DB_CONN.rollback()
             print(f"[{timestamp}] ERROR: {e}")
 
         time.sleep(SLEEP_INTERVAL)
 
 if __name__ == "__main__":
-    collect_metrics()
\ No newline at end of file
+    collect_metrics()
@@ -1,30 +1,139 @@
 import streamlit as st
+import collections
+import math
+import multiprocessing as mp
+import queue
 import subprocess
-import threading
 import time
 import re
+import numpy as np
 import pandas as pd
 import psutil
 import os
-from collections import defaultdict
+from multiprocessing import shared_memory
+
+try:
+    from streamlit_autorefresh import st_autorefresh
+except ImportError:
+    st_autorefresh = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 # ----- Streamlit Setup -----
 st.set_page_config(page_title="🧠 Full System Monitor", layout="wide")
 st.title("📊 Full Real-Time System Monitoring Dashboard")
 
 # ----- Global Data Structures -----
-log_lines = []
+# The bpftrace parser runs in its own process so it never contends with
+# Streamlit for the GIL. It accumulates into the module-level arrays below
+# (its own copies after the fork) and publishes them once a second into a
+# shared-memory block; the dashboard side reads the block through NumPy
+# views, so a refresh costs two array copies and no IPC serialization.
+#
+# Per-process accumulators are flat arrays indexed by pid & PID_MASK rather
+# than a dict: indexed writes, no rehash, and a layout that can live
+# directly in shared memory.
+PID_SLOTS = 1 << 16
+PID_MASK = PID_SLOTS - 1
+
+# Shared block layout: 4 float64 header slots (min/max/sum/count of the
+# per-second switch rate) followed by the three per-PID arrays.
+_HDR_SLOTS = 4
+_SHM_SIZE = (_HDR_SLOTS + 2 * PID_SLOTS) * 8 + PID_SLOTS * 8
+
+
+def shm_views(buf):
+    hdr = np.frombuffer(buf, np.float64, _HDR_SLOTS, 0)
+    offset = _HDR_SLOTS * 8
+    totals = np.frombuffer(buf, np.float64, PID_SLOTS, offset)
+    offset += PID_SLOTS * 8
+    lasts = np.frombuffer(buf, np.float64, PID_SLOTS, offset)
+    offset += PID_SLOTS * 8
+    switches = np.frombuffer(buf, np.int64, PID_SLOTS, offset)
+    return hdr, totals, lasts, switches
+
+
+# Reader-process accumulators; in the dashboard process these stay zero.
 global_stats = {
-    'switches_per_second': [],
+    'switches_per_second': collections.deque(maxlen=600),
     'last_second': int(time.time()),
-    'switch_count': 0
+    'switch_count': 0,
+    # Running reductions so the render path never walks the history
+    'sw_min': float('inf'),
+    'sw_max': 0.0,
+    'sw_sum': 0.0,
+    'sw_cnt': 0,
 }
-
-process_stats = defaultdict(lambda: {
-    'total_time_in_cpu': 0.0,
-    'last_switch_in': None,
-    'context_switches': 0
-})
+_total_time_in_cpu = np.zeros(PID_SLOTS, np.float64)
+_last_switch_in = np.zeros(PID_SLOTS, np.float64)
+_context_switches = np.zeros(PID_SLOTS, np.int64)
+
+# Set inside the reader process before its loop starts
+_shared_views = None
+_shared_lock = None
+_log_queue = None
+
+
+def _publish_stats():
+    """Copy the local accumulators into the shared block (reader side)."""
+    hdr, totals, lasts, switches = _shared_views
+    with _shared_lock:
+        hdr[0] = global_stats['sw_min'] if global_stats['sw_cnt'] else 0.0
+        hdr[1] = global_stats['sw_max']
+        hdr[2] = global_stats['sw_sum']
+        hdr[3] = global_stats['sw_cnt']
+        np.copyto(totals, _total_time_in_cpu)
+        np.copyto(lasts, _last_switch_in)
+        np.copyto(switches, _context_switches)
+
+
+def _emit_log(msg):
+    try:
+        _log_queue.put_nowait(msg)
+    except queue.Full:
+        pass    # dashboard fell behind; drop rather than block the parser
+
+
+def _record_switch_py(prev_idx, next_idx, now, totals, lasts, switches):
+    last_in = lasts[prev_idx]
+    if last_in:
+        totals[prev_idx] += now - last_in
+        lasts[prev_idx] = 0.0
+    lasts[next_idx] = now
+    switches[next_idx] += 1
+
+
+# Jitted when numba is around: the updater runs once per switch event, and
+# the compiled version does four array accesses with no interpreter frame.
+if njit is not None:
+    _record_switch = njit(
+        "void(int64, int64, float64, float64[:], float64[:], int64[:])",
+        cache=True)(_record_switch_py)
+else:
+    _record_switch = _record_switch_py
+
+
+def snapshot_process_stats():
+    """Copy the shared per-PID aggregates under the lock and build the table."""
+    _, totals_view, _, switches_view = _reader['views']
+    with _reader['lock']:
+        total = totals_view.copy()
+        switches = switches_view.copy()
+    active = np.nonzero((switches > 0) | (total > 0))[0]
+    if active.size == 0:
+        return pd.DataFrame()
+    total = total[active]
+    switches = switches[active]
+    efficiency = np.divide(total, switches, out=np.zeros_like(total), where=switches > 0)
+    return pd.DataFrame({
+        "PID": active,
+        "Switches": switches,
+        "CPU Time (s)": np.round(total, 3),
+        "Efficiency (s/switch)": np.round(efficiency, 4),
+    })
 
 
 # ----- BPFTRACE Setup -----
@@ -44,21 +153,52 @@ tracepoint:sched:sched_wakeup
 """)
 
 
-def parse_bpftrace_output(line):
-    now = time.time()
-    if "SWITCH" in line:
-        match = re.search(r'FROM (.*?) \((\d+)\) → TO (.*?) \((\d+)\)', line)
-        if match:
-            prev_comm, prev_pid, next_comm, next_pid = match.groups()
-            prev_pid, next_pid = int(prev_pid), int(next_pid)
+# Compiled once; the str.partition fast paths below avoid the regex engine
+# entirely for well-formed lines, which is all of them in practice.
+_SWITCH_RE = re.compile(r'FROM (.*?) \((\d+)\) → TO (.*?) \((\d+)\)')
+_WAKEUP_RE = re.compile(r'WAKEUP: CPU \d+ \| (.*?) \((\d+)\)')
+
+
+def _fast_switch(line):
+    # "SWITCH: CPU n | FROM comm (pid) → TO comm (pid)"
+    _, sep, rest = line.partition(" | FROM ")
+    if not sep:
+        return None
+    left, sep, right = rest.partition(" → TO ")
+    if not sep:
+        return None
+    prev_comm, sep, prev_pid = left.rpartition(" (")
+    if not sep or not prev_pid.endswith(")") or not prev_pid[:-1].isdigit():
+        return None
+    next_comm, sep, next_pid = right.rstrip().rpartition(" (")
+    if not sep or not next_pid.endswith(")") or not next_pid[:-1].isdigit():
+        return None
+    return prev_comm, prev_pid[:-1], next_comm, next_pid[:-1]
+
+
+def _fast_wakeup(line):
+    # "WAKEUP: CPU n | comm (pid)"
+    _, sep, rest = line.partition(" | ")
+    if not sep:
+        return None
+    comm, sep, pid = rest.rstrip().rpartition(" (")
+    if not sep or not pid.endswith(")") or not pid[:-1].isdigit():
+        return None
+    return comm, pid[:-1]
 
-            if process_stats[prev_pid]['last_switch_in']:
-                delta = now - process_stats[prev_pid]['last_switch_in']
-                process_stats[prev_pid]['total_time_in_cpu'] += delta
-                process_stats[prev_pid]['last_switch_in'] = None
 
-            process_stats[next_pid]['last_switch_in'] = now
-            process_stats[next_pid]['context_switches'] += 1
+def parse_bpftrace_output(line):
+    now = time.time()
+    if line.startswith("SWITCH"):
+        fields = _fast_switch(line)
+        if fields is None:
+            match = _SWITCH_RE.search(line)
+            fields = match.groups() if match else None
+        if fields:
+            prev_comm, prev_pid, next_comm, next_pid = fields
+            _record_switch(int(prev_pid) & PID_MASK, int(next_pid) & PID_MASK,
+                           now, _total_time_in_cpu, _last_switch_in,
+                           _context_switches)
 
             global_stats['switch_count'] += 1
             current_sec = int(now)
@@ -66,32 +206,103 @@ def parse_bpftrace_output(line):
                 elapsed = now - global_stats['last_second']
                 rate = global_stats['switch_count'] / elapsed
                 global_stats['switches_per_second'].append(rate)
+                if rate < global_stats['sw_min']:
+                    global_stats['sw_min'] = rate
+                if rate > global_stats['sw_max']:
+                    global_stats['sw_max'] = rate
+                global_stats['sw_sum'] += rate
+                global_stats['sw_cnt'] += 1
                 global_stats['last_second'] = current_sec
                 global_stats['switch_count'] = 0
+                # Publish once per second, not per event
+                _publish_stats()
 
-            log_lines.append(f"SWITCH: {prev_comm}({prev_pid}) → {next_comm}({next_pid})")
+            _emit_log(f"SWITCH: {prev_comm}({prev_pid}) → {next_comm}({next_pid})")
 
-    elif "WAKEUP" in line:
-        match = re.search(r'WAKEUP: CPU \d+ \| (.*?) \((\d+)\)', line)
-        if match:
-            comm, pid = match.groups()
-            log_lines.append(f"WAKEUP: {comm}({pid})")
+    elif line.startswith("WAKEUP"):
+        fields = _fast_wakeup(line)
+        if fields is None:
+            match = _WAKEUP_RE.search(line)
+            fields = match.groups() if match else None
+        if fields:
+            comm, pid = fields
+            _emit_log(f"WAKEUP: {comm}({pid})")
 
 
 def run_bpftrace():
     write_bpftrace_script()
     proc = subprocess.Popen(["sudo", "bpftrace", "full_stats.bt"],
                             stdout=subprocess.PIPE,
-                            stderr=subprocess.STDOUT,
-                            text=True)
-    for line in proc.stdout:
-        parse_bpftrace_output(line)
-
-
-threading.Thread(target=run_bpftrace, daemon=True).start()
+                            stderr=subprocess.STDOUT)
+    # Raw os.read on the pipe fd: events reach the parser as soon as the
+    # kernel delivers them instead of waiting out the TextIOWrapper buffer,
+    # and one read drains a whole burst of lines in a single syscall.
+    fd = proc.stdout.fileno()
+    carry = b""
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            if proc.poll() is not None:
+                break
+            continue
+        carry += chunk
+        lines = carry.split(b"\n")
+        carry = lines.pop()
+        for raw in lines:
+            parse_bpftrace_output(raw.decode("utf-8", "replace"))
+
+
+def _reader_main(shm_name, lock, log_lines_queue):
+    global _shared_views, _shared_lock, _log_queue
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _shared_views = shm_views(shm.buf)
+    _shared_lock = lock
+    _log_queue = log_lines_queue
+    run_bpftrace()
+
+
+@st.cache_resource
+def start_bpftrace_reader():
+    # Started once per dashboard process, not once per rerun. Forking keeps
+    # the already-imported module (parsers, jitted updater) without
+    # re-executing this script in the child.
+    ctx = mp.get_context("fork")
+    shm = shared_memory.SharedMemory(create=True, size=_SHM_SIZE)
+    lock = ctx.Lock()
+    log_lines_queue = ctx.Queue(maxsize=4096)
+    proc = ctx.Process(target=_reader_main,
+                       args=(shm.name, lock, log_lines_queue), daemon=True)
+    proc.start()
+    return {
+        'process': proc,
+        'shm': shm,
+        'views': shm_views(shm.buf),
+        'lock': lock,
+        'queue': log_lines_queue,
+        'log_lines': collections.deque(maxlen=1024),
+    }
+
+
+_reader = start_bpftrace_reader()
+
+
+def drain_log_lines():
+    """Pull whatever the reader queued since the last rerun."""
+    lines = _reader['log_lines']
+    try:
+        while True:
+            lines.append(_reader['queue'].get_nowait())
+    except queue.Empty:
+        pass
+    return lines
+
+# Primer call: later cpu_percent(percpu=True) calls return deltas without
+# blocking for a sampling interval.
+psutil.cpu_percent(percpu=True)
 
 
 # ----- System Stats -----
+@st.cache_data(ttl=1, show_spinner=False)
 def get_schedstat():
     schedstat_path = "/proc/schedstat"
     if not os.path.exists(schedstat_path):
@@ -114,96 +325,151 @@ def get_schedstat():
     return pd.DataFrame(data)
 
 
+# Process table from one pass over /proc/<pid>/stat instead of a psutil
+# Process object (and several /proc files) per PID. Columns are built as
+# parallel lists and handed to the DataFrame constructor in one go.
+_CLK_TCK = os.sysconf("SC_CLK_TCK")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+_PROC_STATE = {b"R": "running", b"S": "sleeping", b"D": "disk-sleep",
+               b"Z": "zombie", b"T": "stopped", b"t": "tracing-stop",
+               b"X": "dead", b"I": "idle"}
+
+
+@st.cache_resource
+def get_cpu_time_snapshot():
+    # Previous per-PID CPU tick totals; deltas against it give CPU%
+    return {"ticks": {}, "time": time.time()}
+
+
+@st.cache_data(ttl=1, show_spinner=False)
+def get_process_table():
+    snapshot = get_cpu_time_snapshot()
+    prev_ticks = snapshot["ticks"]
+    now = time.time()
+    elapsed = max(now - snapshot["time"], 1e-6)
+    total_mem = psutil.virtual_memory().total
+
+    pids, names, statuses, cpu_percents, mem_percents = [], [], [], [], []
+    ticks_now = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", "rb") as f:
+                buf = f.read()
+        except OSError:
+            continue    # exited mid-scan
+        try:
+            lpar = buf.index(b"(")
+            rpar = buf.rindex(b")")
+            fields = buf[rpar + 2:].split()
+            name = buf[lpar + 1:rpar].decode("utf-8", "replace")
+            ticks = int(fields[11]) + int(fields[12])   # utime + stime
+            rss = int(fields[21])
+            state = _PROC_STATE.get(fields[0], "unknown")
+        except (ValueError, IndexError):
+            continue    # empty or truncated read from a dying process
+
+        pid = int(entry.name)
+        ticks_now[pid] = ticks
+        last = prev_ticks.get(pid)
+        cpu = ((ticks - last) / _CLK_TCK) / elapsed * 100 if last is not None else 0.0
+
+        pids.append(pid)
+        names.append(name)
+        statuses.append(state)
+        cpu_percents.append(cpu)
+        mem_percents.append(rss * _PAGE_SIZE / total_mem * 100)
+
+    snapshot["ticks"] = ticks_now
+    snapshot["time"] = now
+    return pd.DataFrame({
+        "pid": pids,
+        "name": names,
+        "status": statuses,
+        "cpu_percent": cpu_percents,
+        "memory_percent": mem_percents,
+    }).sort_values("cpu_percent", ascending=False)
+
+
 def cpu_heatmap(cpu_usage):
-    n = len(cpu_usage)
-    rows = int(n**0.5)
-    cols = (n + rows - 1) // rows
-    padded = cpu_usage + [0] * (rows * cols - n)
-    return pd.DataFrame([padded[i * cols:(i + 1) * cols] for i in range(rows)])
+    values = np.asarray(cpu_usage, dtype=np.float32)
+    rows = math.isqrt(values.size)
+    cols = (values.size + rows - 1) // rows
+    grid = np.pad(values, (0, rows * cols - values.size)).reshape(rows, cols)
+    return pd.DataFrame(grid)
 
 
 # ----- Dashboard -----
-while True:
+# Natural reruns instead of a busy while/sleep loop: Streamlit diffs widgets
+# between runs and the cached readers keep /proc work to once per tick.
+if st_autorefresh is not None:
+    st_autorefresh(interval=1000, key="tick")
+
+col1, col2 = st.columns(2)
+
+mem = psutil.virtual_memory()
+mem_percent = mem.percent
+cpu_percents = psutil.cpu_percent(percpu=True)
+
+with col1:
+    st.subheader("🧠 Memory Usage")
+    st.metric("Memory % Used", f"{mem_percent:.2f} %")
+    st.progress(mem_percent / 100)
+
+with col2:
+    st.subheader("🧮 Per-Core CPU Usage")
+    df = pd.DataFrame({
+        "Core": [f"Core {i}" for i in range(len(cpu_percents))],
+        "Usage": cpu_percents
+    }).set_index("Core")
+    st.bar_chart(df)
+
+# Heatmap
+st.subheader("🌡️ CPU Heatmap")
+st.dataframe(cpu_heatmap(cpu_percents), use_container_width=True)
+
+# Alerts
+st.subheader("🚨 Alerts")
+if mem_percent > 85:
+    st.error("High memory usage detected!")
+if any(p > 90 for p in cpu_percents):
+    st.warning("Some cores have high CPU usage!")
+
+# Context Switches
+st.subheader("🔁 Context Switch Statistics")
+with _reader['lock']:
+    min_sw, max_sw, sw_sum, sw_cnt = _reader['views'][0].tolist()
+avg_sw = sw_sum / sw_cnt if sw_cnt else 0
+st.write(f"Min: `{min_sw:.2f}`/s, Max: `{max_sw:.2f}`/s, Avg: `{avg_sw:.2f}`/s")
+
+# Live Logs
+st.subheader("📋 Live BPF Logs")
+st.code("\n".join(list(drain_log_lines())[-15:]))
+
+# BPF Per-Process Stats
+st.subheader("⚙️ Process Stats (BPFTrace Tracked)")
+bpf_df = snapshot_process_stats()
+if not bpf_df.empty:
+    bpf_df = bpf_df.sort_values("CPU Time (s)", ascending=False)
+st.dataframe(bpf_df, use_container_width=True)
+
+# Live psutil Process Table
+st.subheader("📊 Live Process Table")
+proc_df = get_process_table()
+st.dataframe(proc_df.head(30), use_container_width=True)
+
+# /proc/schedstat Stats
+st.subheader("🧬 Kernel SchedStat (/proc/schedstat)")
+sched_df = get_schedstat()
+if not sched_df.empty:
+    st.dataframe(sched_df, use_container_width=True)
+
+# Export Logs
+st.subheader("📥 Export BPF Stats")
+st.download_button("Download Process Stats CSV", bpf_df.to_csv(index=False), "bpf_stats.csv", "text/csv")
+
+# Fallback when the autorefresh component is missing: rerun after a second
+if st_autorefresh is None:
     time.sleep(1)
-
-    st.empty()
-    col1, col2 = st.columns(2)
-
-    mem = psutil.virtual_memory()
-    mem_percent = mem.percent
-    cpu_percents = psutil.cpu_percent(percpu=True)
-
-    with col1:
-        st.subheader("🧠 Memory Usage")
-        st.metric("Memory % Used", f"{mem_percent:.2f} %")
-        st.progress(mem_percent / 100)
-
-    with col2:
-        st.subheader("🧮 Per-Core CPU Usage")
-        df = pd.DataFrame({
-            "Core": [f"Core {i}" for i in range(len(cpu_percents))],
-            "Usage": cpu_percents
-        }).set_index("Core")
-        st.bar_chart(df)
-
-    # Heatmap
-    st.subheader("🌡️ CPU Heatmap")
-    st.dataframe(cpu_heatmap(cpu_percents), use_container_width=True)
-
-    # Alerts
-    st.subheader("🚨 Alerts")
-    if mem_percent > 85:
-        st.error("High memory usage detected!")
-    if any(p > 90 for p in cpu_percents):
-        st.warning("Some cores have high CPU usage!")
-
-    # Context Switches
-    st.subheader("🔁 Context Switch Statistics")
-    stats = global_stats['switches_per_second']
-    min_sw = min(stats) if stats else 0
-    max_sw = max(stats) if stats else 0
-    avg_sw = sum(stats) / len(stats) if stats else 0
-    st.write(f"Min: `{min_sw:.2f}`/s, Max: `{max_sw:.2f}`/s, Avg: `{avg_sw:.2f}`/s")
-
-    # Live Logs
-    st.subheader("📋 Live BPF Logs")
-    st.code("\n".join(log_lines[-15:]))
-
-    # BPF Per-Process Stats
-    st.subheader("⚙️ Process Stats (BPFTrace Tracked)")
-    rows = []
-    for pid, stats in process_stats.items():
-        time_in = stats['total_time_in_cpu']
-        switches = stats['context_switches']
-        efficiency = time_in / switches if switches else 0
-        rows.append({
-            "PID": pid,
-            "Switches": switches,
-            "CPU Time (s)": round(time_in, 3),
-            "Efficiency (s/switch)": round(efficiency, 4)
-        })
-    bpf_df = pd.DataFrame(rows).sort_values("CPU Time (s)", ascending=False)
-    st.dataframe(bpf_df, use_container_width=True)
-
-    # Live psutil Process Table
-    st.subheader("📊 Live Process Table")
-    procs = []
-    for p in psutil.process_iter(['pid', 'name', 'status', 'cpu_percent', 'memory_percent']):
-        try:
-            procs.append(p.info)
-        except psutil.NoSuchProcess:
-            pass
-    proc_df = pd.DataFrame(procs).sort_values("cpu_percent", ascending=False)
-    st.dataframe(proc_df.head(30), use_container_width=True)
-
-    # /proc/schedstat Stats
-    st.subheader("🧬 Kernel SchedStat (/proc/schedstat)")
-    sched_df = get_schedstat()
-    if not sched_df.empty:
-        st.dataframe(sched_df, use_container_width=True)
-
-    # Export Logs
-    st.subheader("📥 Export BPF Stats")
-    st.download_button("Download Process Stats CSV", bpf_df.to_csv(index=False), "bpf_stats.csv", "text/csv")
-
-    st.stop()
\ No newline at end of file
+    st.rerun()
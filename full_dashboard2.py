@@ -4,7 +4,6 @@ import streamlit as st
 import sqlite3
 import pandas as pd
 import psutil
-import plotly.express as px
 from datetime import datetime
 import time
 
@@ -13,20 +12,69 @@ DB_FILE = "monitoring.db"
 st.set_page_config(page_title="🖥️ Linux Scheduler Monitor Dashboard", layout="wide")
 st.title(":desktop_computer: Linux Scheduler Monitor Dashboard")
 
-# Auto-refresh every 10s
-st_autorefresh = st.experimental_rerun if 'last_refresh' in st.session_state and (time.time() - st.session_state['last_refresh']) >= 10 else None
-st.session_state['last_refresh'] = time.time()
+# High-frequency panels are isolated in fragments that rerun on their own
+# 10s cadence; the rest of the page renders once instead of the old
+# whole-script rerun dance. On Streamlit builds without the fragment API
+# the panels simply render once.
+def fragment(run_every=None):
+    if hasattr(st, "fragment"):
+        return st.fragment(run_every=run_every)
+    return lambda func: func
+
+
+# One read-only connection for the life of the process instead of a fresh
+# connect per refresh; mmap lets SQLite page the file without read() calls.
+@st.cache_resource
+def get_db_conn():
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-20000")
+    # Index each queried table on timestamp so the ORDER BY ... LIMIT
+    # queries walk the index tail instead of scanning and sorting the table.
+    # Only tables that already exist are indexed; the collector owns creation.
+    existing = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table'")}
+    for table in ("system_metrics", "process_metrics", "cpu_core_stats",
+                  "system_events", "scheduler_metrics"):
+        if table in existing:
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_ts ON {table}(timestamp DESC)")
+    conn.commit()
+    conn.execute("PRAGMA query_only=1")
+    return conn
+
+
+def read_df(conn, query):
+    """Fetch a query into a DataFrame without pandas' read_sql machinery."""
+    try:
+        cur = conn.execute(query)
+    except sqlite3.Error:
+        # Tables the collector hasn't created yet come back as empty frames
+        return pd.DataFrame()
+    return pd.DataFrame(cur.fetchall(), columns=[d[0] for d in cur.description])
+
 
 # Load DB data
+@st.cache_data(ttl=10, show_spinner=False)
 def load_all_data():
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            df_sys = pd.read_sql_query("SELECT * FROM system_metrics ORDER BY timestamp DESC LIMIT 500", conn)
-            df_proc = pd.read_sql_query("SELECT * FROM process_metrics ORDER BY timestamp DESC LIMIT 1000", conn)
-            df_core = pd.read_sql_query("SELECT * FROM cpu_core_stats ORDER BY timestamp DESC LIMIT 500", conn)
-            df_events = pd.read_sql_query("SELECT * FROM system_events ORDER BY timestamp DESC LIMIT 100", conn)
-            df_sched = pd.read_sql_query("SELECT * FROM scheduler_metrics ORDER BY timestamp DESC LIMIT 500", conn)
-            return df_sys, df_proc, df_core, df_events, df_sched
+        conn = get_db_conn()
+        # context_diff comes from a window function so pandas never runs the
+        # per-refresh diff pass
+        # Latest 500 rows returned oldest-first, so the charts never
+        # re-sort in pandas
+        df_sys = read_df(conn, """
+            SELECT * FROM (
+                SELECT *, context_switches - LAG(context_switches) OVER (ORDER BY timestamp)
+                       AS context_diff
+                FROM system_metrics ORDER BY timestamp DESC LIMIT 500
+            ) ORDER BY timestamp ASC
+        """)
+        df_proc = read_df(conn, "SELECT * FROM process_metrics ORDER BY timestamp DESC LIMIT 1000")
+        df_core = read_df(conn, "SELECT * FROM cpu_core_stats ORDER BY timestamp DESC LIMIT 500")
+        df_events = read_df(conn, "SELECT * FROM system_events ORDER BY timestamp DESC LIMIT 100")
+        df_sched = read_df(conn, "SELECT * FROM scheduler_metrics ORDER BY timestamp DESC LIMIT 500")
+        return df_sys, df_proc, df_core, df_events, df_sched
     except Exception as e:
         st.error(f"Database error: {e}")
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
@@ -38,7 +86,7 @@ if df_sys.empty:
     st.warning("No system metrics available.")
     st.stop()
 
-latest = df_sys.iloc[0]
+latest = df_sys.iloc[-1]
 
 # Threshold Alerts
 if latest['cpu_percent'] > 90:
@@ -62,27 +110,52 @@ col3.metric("CPU Cores", f"{psutil.cpu_count(logical=True)}")
 col4.metric("Load Average", f"{latest['load_avg_1']:.2f}")
 
 # CPU usage over time
-st.subheader("CPU Usage Over Time")
-fig = px.line(df_sys.sort_values("timestamp"), x="timestamp", y="cpu_percent", title="CPU Usage (%)")
-st.plotly_chart(fig, use_container_width=True)
+def downsample(df, max_points=200):
+    # ≤200 points is plenty for a trend line and keeps the serialized
+    # payload to the browser small
+    step = max(1, len(df) // max_points)
+    return df.iloc[::step]
+
+
+@fragment(run_every=10)
+def cpu_chart():
+    df_sys = load_all_data()[0]
+    if df_sys.empty:
+        return
+    st.subheader("CPU Usage Over Time")
+    st.line_chart(downsample(df_sys).set_index("timestamp")[["cpu_percent"]])
+
+cpu_chart()
 
 # Context Switch Graph
-st.subheader("Context Switches Over Time")
-df_sys["context_diff"] = df_sys["context_switches"].diff().fillna(0)
-fig2 = px.line(df_sys.sort_values("timestamp"), x="timestamp", y="context_diff", title="Context Switches/sec")
-st.plotly_chart(fig2, use_container_width=True)
+@fragment(run_every=10)
+def context_switch_panel():
+    df_sys = load_all_data()[0]
+    if df_sys.empty:
+        return
+    st.subheader("Context Switches Over Time")
+    df_sys["context_diff"] = df_sys["context_diff"].fillna(0)
+    st.line_chart(downsample(df_sys).set_index("timestamp")[["context_diff"]])
+
+    current = df_sys.iloc[-1]
+    st.header(":repeat: Context Switches")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Avg/sec", f"{df_sys['context_diff'].mean():.0f}")
+    col2.metric("Max/sec", f"{df_sys['context_diff'].max():.0f}")
+    col3.metric("Voluntary", str(int(current.get('voluntary_ctx_switches', 0))))
+    col4.metric("Involuntary", str(int(current.get('involuntary_ctx_switches', 0))))
 
-st.header(":repeat: Context Switches")
-col1, col2, col3, col4 = st.columns(4)
-col1.metric("Avg/sec", f"{df_sys['context_diff'].mean():.0f}")
-col2.metric("Max/sec", f"{df_sys['context_diff'].max():.0f}")
-col3.metric("Voluntary", str(int(latest.get('voluntary_ctx_switches', 0))))
-col4.metric("Involuntary", str(int(latest.get('involuntary_ctx_switches', 0))))
+context_switch_panel()
 
 # Top Processes
-st.header(":runner: Top Processes by CPU")
-if not df_proc.empty:
-    df_now = df_proc[df_proc['timestamp'] == latest['timestamp']]
+@fragment(run_every=10)
+def top_processes():
+    df_sys, df_proc = load_all_data()[:2]
+    st.header(":runner: Top Processes by CPU")
+    if df_sys.empty or df_proc.empty:
+        st.info("No per-process data.")
+        return
+    df_now = df_proc[df_proc['timestamp'] == df_sys.iloc[-1]['timestamp']]
     df_now = df_now.sort_values(by='cpu_time', ascending=False).head(10)
     df_now['CPU%'] = df_now['cpu_time'] / df_now['cpu_time'].sum() * 100
     df_now['Memory'] = ["{:.1f}MB".format(v) for v in (df_now['cpu_time'] * 10)]
@@ -94,8 +167,8 @@ if not df_proc.empty:
     st.dataframe(df_now[['Status', 'pid', 'name', 'CPU%', 'Memory', 'Threads', 'Priority', 'Scheduler']].rename(columns={
         'pid': 'PID', 'name': 'Command'
     }), use_container_width=True)
-else:
-    st.info("No per-process data.")
+
+top_processes()
 
 # Memory
 st.header(":floppy_disk: Memory Statistics")
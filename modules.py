@@ -1,7 +1,9 @@
+import contextlib
+
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-import librosa
+import torchaudio
 import numpy as np
 from torchaudio.models import Conformer
 from intervaltree import Interval, IntervalTree
@@ -9,45 +11,135 @@ from config_utils import load_config
 
 cfg = load_config("config.yaml")
 
+# Hot-path config values bound once at import: the extractors and the
+# detector run per file (or per frame), and a module constant read beats
+# two dict lookups each time. Model-construction code keeps using cfg
+# directly since it only runs at init.
+_SAMPLE_RATE = cfg["audio"]["sample_rate"]
+_N_FFT = cfg["audio"]["n_fft"]
+_HOP_LENGTH = cfg["audio"]["hop_length"]
+_WIN_LENGTH = cfg["audio"]["win_length"]
+_N_MELS = cfg["audio"]["n_mels"]
+_THRESHOLD = cfg["detection"]["threshold"]
+_MIN_LENGTH = cfg["detection"]["min_length"]
+_FRAME_SHIFT = cfg["detection"]["frame_shift"]
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 # ===== Feature Extractor =====
-def zcr_extractor(wav, win_length, hop_length):
+if njit is not None:
+    # Fused single-pass kernel: no sign/diff/window intermediates, frames
+    # split across cores via prange. The eager signature compiles (and
+    # caches) at import instead of on the first call.
+    @njit("float32[:](float32[:], int64, int64, int64)",
+          cache=True, parallel=True, fastmath=True)
+    def _zcr_kernel(wav, win_length, hop_length, num_frames):
+        out = np.empty(num_frames, np.float32)
+        for i in prange(num_frames):
+            start = i * hop_length
+            acc = 0
+            for j in range(start + 1, start + win_length):
+                a = wav[j - 1]
+                b = wav[j]
+                acc += abs(((b > 0) - (b < 0)) - ((a > 0) - (a < 0)))
+            out[i] = acc * 0.5 / win_length
+        return out
+else:
+    _zcr_kernel = None
+
+def zcr_extractor(wav, win_length=_WIN_LENGTH, hop_length=_HOP_LENGTH):
     pad_length = win_length // 2
     wav = np.pad(wav, (pad_length, pad_length), 'constant')
     num_frames = 1 + (wav.shape[0] - win_length) // hop_length
-    zcrs = np.zeros(num_frames)
-    for i in range(num_frames):
-        start = i * hop_length
-        end = start + win_length
-        zcr = np.abs(np.sign(wav[start+1:end]) - np.sign(wav[start:end-1]))
-        zcr = np.sum(zcr) * 0.5 / win_length
-        zcrs[i] = zcr
+    if _zcr_kernel is not None:
+        return _zcr_kernel(np.ascontiguousarray(wav, dtype=np.float32),
+                           win_length, hop_length, num_frames)
+    # NumPy fallback: sign changes computed once over the whole padded
+    # signal, frames reduced over strided views of that buffer. int8 keeps
+    # the diff buffer small.
+    sign = np.sign(wav).astype(np.int8)
+    changes = np.abs(np.diff(sign))
+    windows = np.lib.stride_tricks.sliding_window_view(changes, win_length - 1)[::hop_length]
+    zcrs = windows[:num_frames].sum(axis=1, dtype=np.float32) * (0.5 / win_length)
     return zcrs.astype(np.float32)
 
-def feature_extractor(wav, sr=cfg["audio"]["sample_rate"]):
-    mel = librosa.feature.melspectrogram(
-        y=wav,
-        sr=sr,
-        n_fft=cfg["audio"]["n_fft"],
-        hop_length=cfg["audio"]["hop_length"],
-        n_mels=cfg["audio"]["n_mels"]
-    )
-    mel = librosa.power_to_db(mel, ref=np.max)
-
-    zcr = zcr_extractor(wav,
-        win_length=cfg["audio"]["win_length"],
-        hop_length=cfg["audio"]["hop_length"]
+def make_mel_transform():
+    """Mel spectrogram matching the librosa features the checkpoint was
+    trained on: Slaney filterbank with slaney area normalization and
+    constant (zero) STFT padding, not torchaudio's HTK/reflect defaults.
+    """
+    return torchaudio.transforms.MelSpectrogram(
+        sample_rate=_SAMPLE_RATE,
+        n_fft=_N_FFT,
+        hop_length=_HOP_LENGTH,
+        n_mels=_N_MELS,
+        norm="slaney",
+        mel_scale="slaney",
+        pad_mode="constant",
     )
-    vms = np.var(mel, axis=0)
 
-    mel = torch.tensor(mel).unsqueeze(0)
-    zcr = torch.tensor(zcr).unsqueeze(0)
-    vms = torch.tensor(vms).unsqueeze(0)
+def _assemble_impl(mel, zcr, n_mels: int):
+    # mel (centered STFT) and zcr both produce 1 + len(wav)//hop frames for an
+    # even window; trim defensively in case of a stray off-by-one
+    num_frames = min(int(mel.shape[-1]), int(zcr.shape[-1]))
+    mel = mel[..., :num_frames].unsqueeze(0)
+    zcr = zcr[:num_frames].unsqueeze(0)
 
-    zcr = zcr.unsqueeze(1).expand(-1, cfg["audio"]["n_mels"], -1)
+    zcr = zcr.unsqueeze(1).expand(-1, n_mels, -1)
     vms = torch.var(mel, dim=1).unsqueeze(1).expand(-1, mel.shape[1], -1)
+    return torch.stack((mel, vms, zcr), dim=1)
+
+# Scripted so the trim/expand/var/stack chain fuses into a few kernels
+# instead of one launch per op; these tensors are small enough that
+# dispatch overhead dominates the actual compute.
+try:
+    _assemble = torch.jit.script(_assemble_impl)
+except Exception:
+    _assemble = _assemble_impl
+
+# Lazy CPU transforms for standalone feature_extractor calls (demo.ipynb
+# passes a bare librosa waveform); BreathDetector supplies its own
+# device-resident pair instead.
+_cpu_transforms = None
+
+def _default_transforms():
+    global _cpu_transforms
+    if _cpu_transforms is None:
+        _cpu_transforms = (
+            make_mel_transform(),
+            torchaudio.transforms.AmplitudeToDB(stype="power", top_db=80.0),
+        )
+    return _cpu_transforms
 
-    feature = torch.stack((mel, vms, zcr), dim=1)
-    length = torch.tensor([zcr.shape[-1]])
+def feature_extractor(wav, mel_transform=None, to_db=None):
+    """Build the (mel, vms, zcr) feature stack from a 1-D waveform.
+
+    Called with just a waveform (tensor or NumPy array), the features are
+    computed on CPU with default transforms. BreathDetector passes its own
+    transforms and a waveform already on the target device, so the mel
+    transform runs there too (cuFFT on GPU) and no feature ever crosses
+    the host/device boundary.
+    """
+    if not torch.is_tensor(wav):
+        wav = torch.as_tensor(wav, dtype=torch.float32)
+    if mel_transform is None or to_db is None:
+        mel_transform, to_db = _default_transforms()
+    mel = to_db(mel_transform(wav))
+    mel = mel - mel.max()   # reference to peak power, as librosa's ref=np.max did
+
+    win_length = _WIN_LENGTH
+    hop_length = _HOP_LENGTH
+    pad_length = win_length // 2
+    padded = F.pad(wav, (pad_length, pad_length))
+    sign = padded.sign()
+    changes = (sign[1:] - sign[:-1]).abs()
+    zcr = changes.unfold(0, win_length - 1, hop_length).sum(-1) * (0.5 / win_length)
+
+    feature = _assemble(mel, zcr, _N_MELS)
+    length = torch.tensor([feature.shape[-1]], device=wav.device)
     return feature, length
 
 # ===== Models use cfg =====
@@ -131,24 +223,80 @@ class BreathDetector:
         self.model = model
         self.device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+        # On CPU, dynamically quantize the Linear/LSTM weights to int8:
+        # same graph, ~4x smaller weights and VNNI-friendly matmuls.
+        self._quantized = False
+        if self.device.type == "cpu":
+            try:
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {nn.Linear, nn.LSTM}, dtype=torch.qint8
+                )
+                self._quantized = True
+            except Exception:
+                pass
+
+        # Route attention through the fused scaled_dot_product_attention
+        # kernels (FlashAttention on supported GPUs) and compile the forward
+        # graph once to cut eager-mode dispatch overhead. Both are best-effort:
+        # older torch builds just keep the eager path.
+        if self.device.type == "cuda":
+            try:
+                torch.backends.cuda.enable_flash_sdp(True)
+            except AttributeError:
+                pass
+        try:
+            self.model = torch.compile(self.model, mode="reduce-overhead")
+        except Exception:
+            pass
+
+        # Feature transforms live on the device for the life of the detector,
+        # so the STFT/mel filterbank are built once and run where the model is.
+        self.mel_transform = make_mel_transform().to(self.device)
+        self.to_db = torchaudio.transforms.AmplitudeToDB(stype="power", top_db=80.0)
+
+        # Warm the compiled graph with a representative shape so the first
+        # real file does not pay compilation latency.
+        try:
+            frames = _SAMPLE_RATE // _HOP_LENGTH
+            dummy = torch.zeros(1, 3, _N_MELS, frames, device=self.device)
+            with torch.no_grad():
+                self.model(dummy, torch.tensor([frames], device=self.device))
+        except Exception:
+            pass
+
     def __call__(self, wav_path):
-        wav, sr = librosa.load(wav_path, sr=cfg["audio"]["sample_rate"])
-        feature, length = feature_extractor(wav, sr)
-        feature, length = feature.to(self.device), length.to(self.device)
-        output = self.model(feature, length)
-
-        prediction = (output[0] > cfg["detection"]["threshold"]).nonzero().squeeze().tolist()
-        tree = IntervalTree()
-        if isinstance(prediction, list) and len(prediction) > 1:
-            diffs = np.diff(prediction)
-            splits = np.where(diffs != 1)[0] + 1
-            splits = np.split(prediction, splits)
-            splits = list(filter(lambda split: len(split) > cfg["detection"]["min_length"], splits))
-            for split in splits:
-                if split[-1] * cfg["detection"]["frame_shift"] > split[0] * cfg["detection"]["frame_shift"]:
-                    tree.add(Interval(
-                        round(split[0] * cfg["detection"]["frame_shift"], 2),
-                        round(split[-1] * cfg["detection"]["frame_shift"], 2)
-                    ))
-        return tree
+        wav, sr = torchaudio.load(wav_path)
+        wav = wav.mean(0)   # downmix to mono
+        if sr != _SAMPLE_RATE:
+            wav = torchaudio.functional.resample(wav, sr, _SAMPLE_RATE)
+        if self.device.type == "cuda":
+            wav = wav.pin_memory()
+        wav = wav.to(self.device, non_blocking=True)
+        feature, length = feature_extractor(wav, self.mel_transform, self.to_db)
+        # BF16 autocast halves activation bandwidth through the conv/conformer
+        # stack; the thresholding below happens on the float output either way.
+        # Skipped when the model was dynamically quantized: the int8
+        # Linear/LSTM kernels expect fp32 activations and reject bf16.
+        if self._quantized:
+            autocast = contextlib.nullcontext()
+        else:
+            autocast = torch.autocast(device_type=self.device.type, dtype=torch.bfloat16)
+        with torch.no_grad(), autocast:
+            output = self.model(feature, length)
+
+        # Run-length encode the thresholded frames in NumPy: the padded diff
+        # marks run starts (+1) and the frame after each run (-1), so the
+        # whole split/filter pipeline collapses into a few array ops and the
+        # tree is built from the surviving runs in one constructor call.
+        pred = (output[0] > _THRESHOLD).cpu().numpy().astype(np.int8)
+        boundaries = np.diff(pred, prepend=np.int8(0), append=np.int8(0))
+        starts = np.flatnonzero(boundaries == 1)
+        ends = np.flatnonzero(boundaries == -1) - 1   # last frame of each run
+        lengths = ends - starts + 1
+        keep = (lengths > _MIN_LENGTH) & (ends > starts)
+        shift = _FRAME_SHIFT
+        return IntervalTree(
+            Interval(round(start * shift, 2), round(end * shift, 2))
+            for start, end in zip(starts[keep].tolist(), ends[keep].tolist())
+        )
 
@@ -0,0 +1,47 @@
+# cython: language_level=3
+# Hot-loop parser for /proc/<pid>/stat buffers. Compiled companion to the
+# pure-Python fallback in data_collector.py; build with
+#   python setup.py build_ext --inplace
+
+from libc.stdlib cimport strtoll
+from libc.string cimport memchr
+
+
+cpdef tuple parse_stat(bytes buf, double clk_tck, double boot_time):
+    """Parse one stat buffer -> (name, state, cpu_time, create_time).
+
+    state comes back as a single-byte bytes object; the caller maps it to
+    the psutil-style status string.
+    """
+    cdef const char* s = buf
+    cdef Py_ssize_t n = len(buf)
+    cdef const char* lpar = <const char*>memchr(s, b'(', n)
+    if lpar == NULL:
+        raise ValueError("malformed stat buffer")
+    # comm may itself contain ')': scan for the last one
+    cdef Py_ssize_t rpar = buf.rindex(b")")
+    name = buf[(lpar - s) + 1:rpar].decode("utf-8", "replace")
+
+    cdef const char* p = s + rpar + 2   # first char of the state field
+    state = buf[rpar + 2:rpar + 3]
+
+    # walk space-separated fields after the state; field numbering matches
+    # proc(5) with pid/comm/state already consumed
+    cdef long long utime = 0, stime = 0, starttime = 0
+    cdef int field = 0
+    cdef char* end
+    while p < s + n:
+        if p[0] == b' ':
+            field += 1
+            if field == 11:
+                utime = strtoll(p, &end, 10)
+            elif field == 12:
+                stime = strtoll(p, &end, 10)
+            elif field == 19:
+                starttime = strtoll(p, &end, 10)
+                break
+        p += 1
+
+    cdef double cpu_time = (utime + stime) / clk_tck
+    cdef double create_time = boot_time + starttime / clk_tck
+    return name, state, cpu_time, create_time
@@ -1,6 +1,9 @@
 import subprocess
 import tempfile
 import os
+import re
+
+import numpy as np
 
 BPFTRACE_SCRIPT = """
 tracepoint:sched:sched_switch
@@ -90,6 +93,28 @@ interval:s:60 {
 }
 """
 
+# Per-PID runtime lines from the 60s map dump, e.g. "@run_time_ms[123]: 456"
+_RUNTIME_RE = re.compile(r"^@run_time_ms\[(\d+)\]: (\d+)$")
+
+
+def print_runtime_summary(values):
+    """Recompute the runtime stats in float over the dumped per-PID map.
+
+    The in-script fairness uses bpftrace integer division, which truncates
+    to 0 or 1; one np.fromiter pass gives the exact Jain index plus
+    mean/std without a Python-level loop over the PIDs.
+    """
+    if not values:
+        return
+    arr = np.fromiter(values, dtype=np.int64, count=len(values))
+    total = float(arr.sum())
+    sq = float((arr * arr).sum())
+    n = arr.size
+    fairness = (total * total) / (n * sq) if sq > 0 else 0.0
+    print(f"[python] runtime/PID: n={n} sum={total:.0f}ms "
+          f"mean={arr.mean():.2f}ms std={arr.std():.2f}ms jain={fairness:.3f}")
+
+
 def run_bpftrace():
     with tempfile.NamedTemporaryFile("w", delete=False, suffix=".bt") as f:
         f.write(BPFTRACE_SCRIPT)
@@ -97,17 +122,30 @@ def run_bpftrace():
 
     try:
         print(f"Running BPFTrace from: {script_path}")
+        # Line-buffered so each stats block is printed as bpftrace emits
+        # it, not when the default 8KB pipe buffer happens to fill.
         proc = subprocess.Popen(["sudo", "bpftrace", script_path],
                                 stdout=subprocess.PIPE,
                                 stderr=subprocess.STDOUT,
-                                text=True)
+                                text=True, bufsize=1)
 
+        runtime_values = []
         while True:
             line = proc.stdout.readline()
             if not line and proc.poll() is not None:
                 break
-            if line:
-                print(line.strip())
+            if not line:
+                continue
+            line = line.strip()
+            match = _RUNTIME_RE.match(line)
+            if match:
+                runtime_values.append(int(match.group(2)))
+            elif line.startswith("====") and runtime_values:
+                # New stats block: summarize the previous dump first
+                print_runtime_summary(runtime_values)
+                runtime_values = []
+            print(line)
+        print_runtime_summary(runtime_values)
     except KeyboardInterrupt:
         proc.terminate()
         print("BPFTrace monitoring stopped.")
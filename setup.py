@@ -0,0 +1,9 @@
+from setuptools import setup
+from Cython.Build import cythonize
+
+# Builds the optional compiled /proc stat parser used by data_collector.py:
+#   python setup.py build_ext --inplace
+setup(
+    name="parse_stat",
+    ext_modules=cythonize("parse_stat.pyx", language_level=3),
+)